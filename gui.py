@@ -2,18 +2,29 @@
 import base64
 from PyQt5.QtWidgets import (
     QWidget, QPushButton, QVBoxLayout, QHBoxLayout,
-    QFileDialog, QLineEdit, QLabel, QComboBox, QSizePolicy
+    QFileDialog, QLineEdit, QLabel, QComboBox, QSizePolicy, QApplication
 )
 from PyQt5.QtGui import QColor, QPalette, QPixmap, QIcon
-from PyQt5.QtCore import Qt, QTimer
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as Canvas
-from matplotlib.figure import Figure
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
 from ico.icon_bese64 import icon_base64
 from logic import VESCWorker
+from startup import profiler
+
+PLOT_WINDOW = 100   # с, ширина живого вікна графіка
+PLOT_HOP = 20       # с, крок зсуву вікна — повна перемальовка лише при зсуві
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    h, rem = divmod(seconds, 3600)
+    m, s = divmod(rem, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m:02d}:{s:02d}"
 
 
 class MainWindow(QWidget):
+    plot_ready = pyqtSignal()
+
     def __init__(self):
         super().__init__()
 
@@ -31,6 +42,7 @@ class MainWindow(QWidget):
         self.controller.connection_status.connect(self.update_connection_status)
         self.controller.mode_status.connect(self.update_mode_status)
         self.controller.lamp_status.connect(self.update_lamp)
+        self.controller.error.connect(self.show_error)
 
         self.port_timer = QTimer()
         self.port_timer.timeout.connect(self.refresh_ports)
@@ -40,30 +52,19 @@ class MainWindow(QWidget):
         self.y_data = []
         self.duty_data = []
         self.current_data = []
+        self.plan_origin = 0.0            # час сесії, з якого малюється план циклограми
+        self.plan_pending = True          # план ще не запущено: прив'язаний до plan_origin
+        self.shown_step = None
+        self._background = None
 
         # --------------------- Графік ---------------------
-        self.canvas = Canvas(Figure(figsize=(6, 4)))
-        self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
-        self.canvas.updateGeometry()
-        self.canvas.figure.tight_layout()
-        self.ax = self.canvas.figure.add_subplot(111)
-        self.line, = self.ax.plot([], [], label="RPM", color="blue")
-        self.ax.set_xlabel("Час (с)")
-        self.ax.set_ylabel("RPM")
-        self.ax.legend(loc="upper left")
-        self.ax.grid(True)
-
-        self.ax2 = self.ax.twinx()
-        self.line_duty, = self.ax2.plot([], [], label="Duty", color="orange", linestyle="--")
-        self.ax2.set_ylabel("Duty")
-        self.ax2.legend(loc="upper center")
-
-        self.ax3 = self.ax.twinx()
-        self.ax3.spines["right"].set_position(("outward", 55))  # зсув праворуч
-        self.line_current, = self.ax3.plot([], [], label="Current", color="green", linestyle=":")
-        self.ax3.legend(loc="upper right")
-        self.ax3.set_ylabel("Current (A)")
-        self.canvas.figure.tight_layout()
+        # matplotlib імпортується після показу вікна (див. _init_plot)
+        self.canvas = None
+        self.plot_placeholder = QLabel("Завантаження графіка...")
+        self.plot_placeholder.setAlignment(Qt.AlignCenter)
+        self.plot_placeholder.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.plot_placeholder.setMinimumSize(600, 400)
+        QTimer.singleShot(0, self._init_plot)
 
         # --------------------- Параметри ---------------------
         self.pole_pairs_input = QLineEdit("3")
@@ -101,6 +102,10 @@ class MainWindow(QWidget):
         self.mode_label = QLabel("Mode: idle")
         port_layout.addWidget(self.mode_label)
 
+        self.error_label = QLabel("")
+        self.error_label.setStyleSheet("color: red;")
+        port_layout.addWidget(self.error_label)
+
         self.connect_btn.clicked.connect(self.connect_port)
         self.disconnect_btn.clicked.connect(self.disconnect_port)
 
@@ -117,6 +122,7 @@ class MainWindow(QWidget):
         self.cycle_mode_label = QLabel("Cycle by:")
         self.cycle_mode_combo = QComboBox()
         self.cycle_mode_combo.addItems(["Duty", "RPM"])
+        self.cycle_mode_combo.currentTextChanged.connect(self.on_cycle_mode_changed)
 
         self.manual_input = QLineEdit("0.07")
         self.manual_input.setPlaceholderText("Duty (0.0 ... 1.0)")
@@ -158,19 +164,201 @@ class MainWindow(QWidget):
         self.current_display = QLabel("Current: 0 A")
         self.current_display.setAlignment(Qt.AlignCenter)
 
+        self.cycle_info_label = QLabel("Циклограма: —")
+        self.cycle_info_label.setAlignment(Qt.AlignCenter)
+
         info_layout = QHBoxLayout()
         info_layout.addWidget(self.rpm_display)
         info_layout.addWidget(self.current_display)
+        info_layout.addWidget(self.cycle_info_label)
 
         # --------------------- Layout ---------------------
         layout = QVBoxLayout()
         layout.addLayout(param_layout)
-        layout.addWidget(self.canvas)
+        layout.addWidget(self.plot_placeholder)
         layout.addLayout(port_layout)
         layout.addLayout(cycle_layout)
         layout.addLayout(info_layout)
         self.setLayout(layout)
 
+    def _init_plot(self):
+        # спершу домальовуємо вікно, потім вантажимо важкий стек matplotlib
+        QApplication.processEvents()
+        profiler.mark("window painted")
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as Canvas
+        from matplotlib.figure import Figure
+        profiler.mark("import matplotlib")
+
+        self.canvas = Canvas(Figure(figsize=(6, 4)))
+        self.canvas.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        self.canvas.updateGeometry()
+        self.canvas.figure.tight_layout()
+        self.ax = self.canvas.figure.add_subplot(111)
+        # живі лінії animated: малюються блітом поверх кешованого фону
+        self.line, = self.ax.plot([], [], label="RPM", color="blue", animated=True)
+        self.line_plan_rpm, = self.ax.plot([], [], label="_nolegend_", color="blue", alpha=0.35,
+                                           linewidth=3, drawstyle="steps-post")
+        self.ax.set_xlabel("Час (с)")
+        self.ax.set_ylabel("RPM")
+        self.ax.set_xlim(0, 1)
+        self.ax.grid(True)
+
+        self.ax2 = self.ax.twinx()
+        self.line_duty, = self.ax2.plot([], [], label="Duty", color="orange", linestyle="--", animated=True)
+        self.line_plan_duty, = self.ax2.plot([], [], label="_nolegend_", color="orange", alpha=0.35,
+                                             linewidth=3, drawstyle="steps-post")
+        self.ax2.set_ylabel("Duty")
+
+        self.ax3 = self.ax.twinx()
+        self.ax3.spines["right"].set_position(("outward", 55))  # зсув праворуч
+        self.line_current, = self.ax3.plot([], [], label="Current", color="green", linestyle=":", animated=True)
+        self.ax3.set_ylabel("Current (A)")
+        self._build_legends()
+        self.canvas.figure.tight_layout()
+
+        self.layout().replaceWidget(self.plot_placeholder, self.canvas)
+        self.plot_placeholder.deleteLater()
+        self.plot_placeholder = None
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self.render_cycle_preview()
+        profiler.mark("plot ready")
+        self.plot_ready.emit()
+
+    def _on_draw(self, event):
+        # після кожної повної перемальовки (зокрема resize) кешуємо статичний фон
+        self._background = self.canvas.copy_from_bbox(self.canvas.figure.bbox)
+        self._draw_live_lines()
+
+    def _build_legends(self):
+        # легенди теж animated — малюються після живих ліній, щоб лишатися поверх даних
+        self.legends = [
+            self.ax.legend(loc="upper left"),
+            self.ax2.legend(loc="upper center"),
+            self.ax3.legend(loc="upper right"),
+        ]
+        for legend in self.legends:
+            legend.set_animated(True)
+
+    def _draw_live_lines(self):
+        for line in (self.line, self.line_duty, self.line_current):
+            line.axes.draw_artist(line)
+        for legend in self.legends:
+            legend.axes.draw_artist(legend)
+
+    def _blit(self):
+        if self._background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self._background)
+        self._draw_live_lines()
+        self.canvas.blit(self.canvas.figure.bbox)
+
+    def _limits_stale(self, t, rpm, duty, current):
+        left, right = self.ax.get_xlim()
+        if not (left <= t < right):
+            return True
+        for ax, value in ((self.ax, rpm), (self.ax2, duty), (self.ax3, current)):
+            low, high = ax.get_ylim()
+            if not (low <= value <= high):
+                return True
+        return False
+
+    def _rescale(self):
+        for ax in (self.ax, self.ax2, self.ax3):
+            ax.relim()
+            ax.autoscale_view(True, True, True)
+
+    def selected_cycle_mode(self):
+        return "rpm" if self.cycle_mode_combo.currentText().strip().lower() == "rpm" else "duty"
+
+    def on_cycle_mode_changed(self, _text):
+        if not self.controller.cycle_active:
+            self.plan_pending = True
+            self.render_cycle_preview()
+
+    def show_cycle_summary(self):
+        steps = self.controller.active_cycle_data(self.selected_cycle_mode())
+        if steps:
+            total = format_duration(self.controller.cycle_total_duration)
+            self.cycle_info_label.setText(f"Циклограма: {len(steps)} кроків, {total}")
+        else:
+            self.cycle_info_label.setText("Циклограма: —")
+
+    def _plan_points(self, mode):
+        xs, ys = self.controller.cycle_profiles[mode]
+        starts = [] if self.plan_pending else list(self.controller.cycle_step_starts)[:len(xs)]
+        if not starts:
+            return [self.plan_origin + x for x in xs], ys
+        # запущений план: пройдені кроки — за фактичним часом початку, решта — від останнього
+        starts = [s - self.controller.start_time for s in starts]
+        k = len(starts) - 1
+        return starts + [starts[k] + x - xs[k] for x in xs[k + 1:]], ys
+
+    def _set_plan_line(self, mode):
+        xs, ys = self._plan_points(mode)
+        active_line = self.line_plan_rpm if mode == "rpm" else self.line_plan_duty
+        for line in (self.line_plan_rpm, self.line_plan_duty):
+            if line is active_line and xs:
+                line.set_data(xs, ys)
+                line.set_label("RPM план" if line is self.line_plan_rpm else "Duty план")
+            else:
+                line.set_data([], [])
+                line.set_label("_nolegend_")
+        self._build_legends()
+        return xs
+
+    def render_cycle_preview(self):
+        """Малює план циклограми як статичну лінію фону.
+
+        До старту план прив'язаний до поточного часу сесії; після старту — до фактичних
+        початків кроків, тож по завершенні прогону він лишається поруч із виміряною кривою.
+        """
+        if self.controller.cycle_active:
+            mode = self.controller.cycle_mode
+            self.shown_step = None
+        else:
+            mode = self.selected_cycle_mode()
+            self.show_cycle_summary()
+        total = self.controller.cycle_total_duration
+        if self.canvas is None:
+            return
+
+        if self.plan_pending and self.x_data:
+            self.plan_origin = self.x_data[-1]
+        xs = self._set_plan_line(mode)
+
+        if not self.plan_pending or not xs:
+            right = max(1.0, self.plan_origin + PLOT_HOP)
+            self.ax.set_xlim(max(0.0, right - PLOT_WINDOW), right)
+        else:
+            # до старту показуємо всю часову шкалу циклограми
+            self.ax.set_xlim(self.plan_origin, self.plan_origin + max(1.0, total))
+        self._rescale()
+        self.canvas.draw()
+
+    def update_cycle_info(self):
+        if not self.controller.cycle_active:
+            if self.shown_step is not None:
+                self.shown_step = None
+                self.show_cycle_summary()
+                self._redraw_plan()
+            return
+        step = self.controller.cycle_index
+        if step == self.shown_step:
+            return
+        self.shown_step = step
+        self._redraw_plan()
+        n = len(self.controller.active_cycle_data())
+        total = format_duration(self.controller.cycle_total_duration)
+        self.cycle_info_label.setText(f"Крок {min(step + 1, n)}/{n} · {total}")
+
+    def _redraw_plan(self):
+        # зміна кроку: підтягуємо план до фактичного початку кроку (раз на крок)
+        if self.canvas is None or self.plan_pending:
+            return
+        self._set_plan_line(self.controller.cycle_mode)
+        self.canvas.draw()
+
     def refresh_ports(self):
         prev = self.port_combo.currentText()
         new_ports = self.controller.get_available_ports()
@@ -196,12 +384,19 @@ class MainWindow(QWidget):
         if path:
             self.file_line.setText(path)
             self.controller.load_cycle(path)
+            if not self.controller.cycle_active:
+                self.plan_pending = True
+            self.render_cycle_preview()
 
     def start_cycle(self):
         self.controller.pole_pairs = self.get_pole_pairs()
         chosen = self.cycle_mode_combo.currentText().strip().lower()
         self.controller.cycle_mode = "rpm" if chosen == "rpm" else "duty"
         self.controller.start_cycle()
+        if self.controller.cycle_active:
+            self.plan_origin = self.controller.cycle_start_time - self.controller.start_time
+            self.plan_pending = False
+            self.render_cycle_preview()
 
     def save_csv(self):
         from datetime import datetime
@@ -246,6 +441,13 @@ class MainWindow(QWidget):
             self.duty_data.pop(0)
             self.current_data.pop(0)
 
+        self.rpm_display.setText(f"RPM: {int(rpm)}")
+        self.current_display.setText(f"Current: {current:.2f} A")
+        self.update_cycle_info()
+
+        if self.canvas is None:
+            return
+
         if len(self.x_data) == len(self.y_data) == len(self.duty_data) == len(self.current_data):
             self.line.set_xdata(self.x_data)
             self.line.set_ydata(self.y_data)
@@ -254,25 +456,28 @@ class MainWindow(QWidget):
             self.line_current.set_xdata(self.x_data)
             self.line_current.set_ydata(self.current_data)
 
-        if t > 0.1:
-            self.ax.set_xlim(max(0, t - 100), t)
+        # фон (осі, сітка, план циклограми) перемальовуємо лише коли точка виходить за межі
+        if self._limits_stale(t, rpm, duty, current):
+            left, right = self.ax.get_xlim()
+            if not (left <= t < right):
+                if self.plan_pending and self.controller.cycle_profiles[self.selected_cycle_mode()][0]:
+                    # до старту план рухається разом із часом, щоб лишатися на виду
+                    self.render_cycle_preview()
+                    return
+                right = max(1.0, t + PLOT_HOP)
+                self.ax.set_xlim(max(0.0, right - PLOT_WINDOW), right)
+            self._rescale()
+            self.canvas.draw()
         else:
-            self.ax.set_xlim(0, 1)
-
-        self.ax.relim()
-        self.ax.autoscale_view(True, True, True)
-        self.ax2.relim()
-        self.ax2.autoscale_view(True, True, True)
-        self.ax3.relim()
-        self.ax3.autoscale_view(True, True, True)
-
-        self.canvas.draw()
-        self.rpm_display.setText(f"RPM: {int(rpm)}")
-        self.current_display.setText(f"Current: {current:.2f} A")
+            self._blit()
 
     def update_connection_status(self, status):
         self.connection_label.setText("Статус: ✅" if status else "Статус: ❌")
 
+    def show_error(self, message):
+        self.error_label.setText(message)
+        self.error_label.setToolTip(message)
+
     def update_mode_status(self, mode):
         self.mode_label.setText(f"Mode: {mode}")
 
@@ -300,9 +505,9 @@ class MainWindow(QWidget):
         self.y_data = []
         self.duty_data = []
         self.current_data = []
-        self.canvas.draw()
         self.rpm_display.setText("RPM: 0")
         self.controller.reset_session()
+        self.reanchor_plan()
         self.refresh_ports()
         if selected_port in [self.port_combo.itemText(i) for i in range(self.port_combo.count())]:
             self.port_combo.setCurrentText(selected_port)
@@ -317,6 +522,13 @@ class MainWindow(QWidget):
         self.y_data.clear()
         self.duty_data.clear()
         self.current_data.clear()
-        self.canvas.draw()
         self.rpm_display.setText("RPM: 0")
         self.updating = True
+        self.reanchor_plan()
+
+    def reanchor_plan(self):
+        # час сесії почався заново — старий план на цій шкалі нічого не означає
+        if not self.controller.cycle_active:
+            self.plan_pending = True
+            self.plan_origin = 0.0
+        self.render_cycle_preview()
@@ -4,11 +4,23 @@ import csv
 import threading
 import serial
 import serial.tools.list_ports
-from pyvesc import encode, encode_request, decode
-from pyvesc.VESC.messages import SetDutyCycle, GetValues, SetRPM
 from PyQt5.QtCore import QObject, pyqtSignal, QThread
 
 
+def _compile_profile(data):
+    # [(duration, value)] -> ступінчасті точки (t, value) від початку циклу для drawstyle="steps-post"
+    xs, ys = [], []
+    t = 0.0
+    for duration, value in data:
+        xs.append(t)
+        ys.append(float(value))
+        t += float(duration)
+    if xs:
+        xs.append(t)
+        ys.append(ys[-1])
+    return xs, ys
+
+
 class VESCWorker(QObject):
     data_ready = pyqtSignal(float, float, float, float)  # elapsed_time, rpm, duty, current
     connection_status = pyqtSignal(bool)
@@ -37,11 +49,15 @@ class VESCWorker(QObject):
         self.cycle_index = 0
         self.cycle_start_time = time.time()
         self._next_save_time = time.time() + 0.1
+        self.protocol_error = None        # помилка імпорту pyvesc у _read_loop
 
         # НОВЕ: режим і окремі масиви для duty/rpm
         self.cycle_mode = "duty"          # 'duty' або 'rpm'
         self.cycle_data_duty = []         # [(duration, duty)]
         self.cycle_data_rpm = []          # [(duration, rpm_mech)]
+        self.cycle_profiles = {"duty": ([], []), "rpm": ([], [])}  # скомпільовані при завантаженні
+        self.cycle_total_duration = 0.0
+        self.cycle_step_starts = []       # фактичний time.time() початку кожного кроку (+ кінець)
 
         # QThread для циклу зчитування
         self._thread = QThread()
@@ -60,6 +76,11 @@ class VESCWorker(QObject):
         return [p.device for p in ports]
 
     def connect(self, port):
+        if self.protocol_error:
+            self.connection_status.emit(False)
+            self.lamp_status.emit("red")
+            self.error.emit(self.protocol_error)
+            return False
         try:
             if self.ser and self.ser.is_open:
                 self.log.emit("Already connected")
@@ -135,19 +156,30 @@ class VESCWorker(QObject):
             # сумісність зі старою логікою
             self.cycle_data = list(self.cycle_data_duty)
 
+            self.cycle_profiles = {
+                "duty": _compile_profile(self.cycle_data_duty),
+                "rpm": _compile_profile(self.cycle_data_rpm),
+            }
+            self.cycle_total_duration = float(dur.sum())
+
         except Exception as e:
             self.error.emit(f"Помилка при завантаженні циклограми: {e}")
             self.cycle_data_duty = []
             self.cycle_data_rpm = []
             self.cycle_data = []
+            self.cycle_profiles = {"duty": ([], []), "rpm": ([], [])}
+            self.cycle_total_duration = 0.0
+
+    def active_cycle_data(self, mode=None):
+        mode = mode or self.cycle_mode
+        if mode == "rpm":
+            return self.cycle_data_rpm
+        return self.cycle_data_duty if self.cycle_data_duty else self.cycle_data
 
     def start_cycle(self):
         with self.lock:
             # вибираємо активні дані відповідно до режиму
-            if self.cycle_mode == "rpm":
-                active = self.cycle_data_rpm
-            else:
-                active = self.cycle_data_duty if self.cycle_data_duty else self.cycle_data
+            active = self.active_cycle_data()
 
             if not active:
                 self.cycle_active = False
@@ -164,6 +196,7 @@ class VESCWorker(QObject):
             self.manual_rpm = None
             self.cycle_index = 0
             self.cycle_start_time = time.time()
+            self.cycle_step_starts = [self.cycle_start_time]
         self.mode_status.emit("cycle")
         self.lamp_status.emit("green")
 
@@ -196,6 +229,8 @@ class VESCWorker(QObject):
             if not self.ser or not getattr(self.ser, "is_open", False):
                 return
             duty = max(0.0, min(1.0, float(duty)))
+            from pyvesc import encode
+            from pyvesc.VESC.messages import SetDutyCycle
             self.ser.write(encode(SetDutyCycle(duty)))
         except Exception as e:
             self.error.emit(f"_set_duty error: {e}")
@@ -214,12 +249,24 @@ class VESCWorker(QObject):
             if not self.ser or not getattr(self.ser, "is_open", False):
                 return
             erpm = int(float(rpm_mech) * float(self.pole_pairs))
+            from pyvesc import encode
+            from pyvesc.VESC.messages import SetRPM
             self.ser.write(encode(SetRPM(erpm)))
         except Exception as e:
             self.error.emit(f"_set_rpm error: {e}")
 
     # ---------- Основний цикл ----------
     def _read_loop(self):
+        # pyvesc будує таблиці повідомлень при імпорті — вантажимо його тут,
+        # у робочому потоці, щоб не гальмувати показ вікна
+        try:
+            from pyvesc import encode, encode_request, decode
+            from pyvesc.VESC.messages import GetValues
+        except Exception as e:
+            # без pyvesc опитувати нічого; connect() відмовлятиме з цією помилкою
+            self.protocol_error = f"pyvesc import error: {e}"
+            self.error.emit(self.protocol_error)
+            return
         while True:
             if self.running and self.ser and self.ser.is_open:
                 current_time = time.time() - self.start_time
@@ -238,16 +285,14 @@ class VESCWorker(QObject):
                             self.lamp_status.emit("blue")
                         elif self.cycle_active and (self.cycle_data_duty or self.cycle_data_rpm or self.cycle_data):
                             # обрати активний набір під режим
-                            if self.cycle_mode == "rpm":
-                                active = self.cycle_data_rpm
-                            else:
-                                active = self.cycle_data_duty if self.cycle_data_duty else self.cycle_data
+                            active = self.active_cycle_data()
 
                             if self.cycle_index < len(active):
                                 duration, value = active[self.cycle_index]
                                 if (time.time() - self.cycle_start_time) >= duration:
                                     self.cycle_index += 1
                                     self.cycle_start_time = time.time()
+                                    self.cycle_step_starts.append(self.cycle_start_time)
                             else:
                                 self.cycle_active = False
                                 self.manual_duty = None
@@ -310,6 +355,7 @@ class VESCWorker(QObject):
             self.last_save_time = time.time()
             self.cycle_index = 0
             self.cycle_start_time = time.time()
+            self.cycle_step_starts = []
             self.manual_duty = None
             self.cycle_active = False
             with self.csv_lock:
@@ -1,13 +1,55 @@
 #main.py
+from startup import profiler
+import os
 import sys
 from PyQt5.QtWidgets import QApplication
-from gui import MainWindow
 from PyQt5.QtCore import Qt
+profiler.mark("import PyQt5")
+from gui import MainWindow
+profiler.mark("import gui")
+
+
+def parse_startup_flags(argv):
+    # --profile-startup          звіт про фази запуску після побудови графіка
+    # --startup-budget=SECONDS   те ж + вихід із кодом 1, якщо запуск довший за бюджет
+    budget = None
+    rest = []
+    for arg in argv:
+        if arg == "--profile-startup":
+            profiler.enabled = True
+        elif arg.startswith("--startup-budget="):
+            profiler.enabled = True
+            try:
+                budget = float(arg.split("=", 1)[1])
+            except ValueError:
+                sys.exit(f"Invalid {arg!r}; usage: --startup-budget=SECONDS (e.g. --startup-budget=5)")
+        else:
+            rest.append(arg)
+    return rest, budget
+
 
 if __name__ == "__main__":
+    argv, budget = parse_startup_flags(sys.argv)
     QApplication.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     QApplication.setAttribute(Qt.AA_UseHighDpiPixmaps, True)
-    app = QApplication(sys.argv)
+    app = QApplication(argv)
+    profiler.mark("QApplication")
     w = MainWindow()
+    profiler.mark("MainWindow()")
     w.show()
+    profiler.mark("window shown")
+
+    if profiler.enabled:
+        def on_plot_ready():
+            profiler.emit()
+            if budget is not None:
+                # _read_loop ніколи не завершується, тож штатний вихід Qt з живим QThread
+                # може аварійно завершити процес і зіпсувати код виходу
+                w.close()
+                for stream in (sys.stdout, sys.stderr):
+                    if stream is not None:
+                        stream.flush()
+                os._exit(0 if profiler.total() <= budget else 1)
+        w.plot_ready.connect(on_plot_ready)
+
     sys.exit(app.exec_())
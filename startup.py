@@ -0,0 +1,44 @@
+#startup.py
+import os
+import sys
+import time
+
+
+class StartupProfiler:
+    """Фіксує час фаз запуску (імпорти, створення вікна, графік) від імпорту цього модуля.
+
+    Це практично старт інтерпретатора; розпакування --onefile бутлоадером PyInstaller
+    сюди не входить.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.t0 = time.perf_counter()
+        self.phases = []              # [(name, seconds_since_t0)]
+
+    def mark(self, name):
+        self.phases.append((name, time.perf_counter() - self.t0))
+
+    def total(self):
+        return self.phases[-1][1] if self.phases else 0.0
+
+    def report(self):
+        lines = ["Startup profile (since interpreter start, excludes --onefile unpack):"]
+        prev = 0.0
+        for name, t in self.phases:
+            lines.append(f"  {name:<28} +{(t - prev) * 1000:8.1f} ms  {t * 1000:8.1f} ms")
+            prev = t
+        lines.append(f"  {'total':<28} {'':<14}{self.total() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+    def emit(self, path="startup_profile.txt"):
+        # у --windowed збірці PyInstaller stderr відсутній — пишемо у файл
+        text = self.report()
+        if sys.stderr is not None:
+            print(text, file=sys.stderr)
+        else:
+            with open(os.path.abspath(path), "w", encoding="utf-8") as f:
+                f.write(text + "\n")
+
+
+profiler = StartupProfiler()